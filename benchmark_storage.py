@@ -0,0 +1,97 @@
+"""
+Сравнение форматов экспорта данных библиотеки по размеру файла и скорости.
+
+Запуск:
+    python benchmark_storage.py [--books N] [--users N] [--loans N] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from library import Library
+from book import Book
+from user import User
+import storage
+
+
+_EXTENSIONS = {
+    "pretty": ".json",
+    "compact": ".json",
+    "gzip": ".json.gz",
+    "lzma": ".json.xz",
+    "jsonl": ".jsonl",
+}
+
+
+def build_library(books: int, users: int, loans: int) -> Library:
+    """Создание библиотеки с тестовыми данными."""
+    library = Library()
+    for i in range(books):
+        library.add_book(Book(f"Книга {i}", f"Автор {i % 100}", f"book_{i}"))
+    for i in range(users):
+        library.add_user(User(f"Читатель {i}", f"user_{i}"))
+    # Без пользователей выдавать книги некому
+    for i in range(min(loans, books) if users else 0):
+        library.borrow_book(f"Читатель {i % users}", f"Книга {i}")
+    return library
+
+
+def measure(library: Library, mode: str, directory: str, repeat: int) -> dict:
+    """Замер размера файла и времени сохранения/загрузки для одного режима."""
+    filename = os.path.join(directory, f"bench_{mode}{_EXTENSIONS[mode]}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if not library.save_to_file(filename, mode):
+            raise SystemExit(f"Не удалось сохранить в режиме {mode}")
+    save_time = (time.perf_counter() - start) / repeat
+
+    target = Library()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if not target.load_from_file(filename, mode):
+            raise SystemExit(f"Не удалось загрузить в режиме {mode}")
+    load_time = (time.perf_counter() - start) / repeat
+
+    return {
+        "mode": mode,
+        "size": os.path.getsize(filename),
+        "save": save_time,
+        "load": load_time,
+    }
+
+
+def main():
+    """Главная функция бенчмарка."""
+    parser = argparse.ArgumentParser(description="Сравнение форматов экспорта")
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--loans", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if min(args.books, args.users, args.loans) < 0:
+        parser.error("--books, --users и --loans не могут быть отрицательными")
+    if args.repeat < 1:
+        parser.error("--repeat должно быть не меньше 1")
+
+    library = build_library(args.books, args.users, args.loans)
+    print(f"Кодировщик JSON: {storage.encoder_name()}")
+    print(f"Книг: {args.books}, пользователей: {args.users}, выдач: {len(library.loans)}\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [measure(library, mode, directory, args.repeat) for mode in storage.MODES]
+
+    # Пропускная способность считается по объёму несжатого компактного JSON
+    raw_megabytes = next(r["size"] for r in results if r["mode"] == "compact") / (1024 * 1024)
+    baseline = results[0]["size"]
+    print(f"{'режим':<8} {'размер, КБ':>11} {'доля':>6} {'запись, мс':>11} {'чтение, мс':>11} {'МБ/с запись':>12}")
+    for result in results:
+        print(f"{result['mode']:<8} {result['size'] / 1024:>11.1f} {result['size'] / baseline:>6.2f} "
+              f"{result['save'] * 1000:>11.1f} {result['load'] * 1000:>11.1f} "
+              f"{raw_megabytes / result['save']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,127 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+from book_copy import BookCopy
 
 
 class Book:
     """Класс для представления книги в библиотеке."""
     
-    def __init__(self, title: str, author: str, book_id: Optional[str] = None):
+    # Срок действия бронирования (в днях)
+    RESERVATION_PERIOD_DAYS = 7
+    
+    def __init__(self, title: str, author: str, book_id: Optional[str] = None, copies: int = 1):
         """
         Инициализация книги.
         
+        Книга - это запись каталога (название), у которой может быть несколько
+        физических экземпляров. Счётчики доступных и всех экземпляров
+        поддерживаются за O(1).
+        
         Args:
             title: Название книги
             author: Автор книги
             book_id: Уникальный идентификатор книги (генерируется автоматически, если не указан)
+            copies: Количество экземпляров при создании
         """
         self.title = title
         self.author = author
         self.book_id = book_id or f"book_{id(self)}"
-        self.is_available = True
+        self.copies: Dict[str, BookCopy] = {}  # barcode -> BookCopy
+        self.free_barcodes: List[str] = []  # Стек штрихкодов экземпляров, находящихся в библиотеке
         self.reservations: List[str] = []  # Список имён пользователей, зарезервировавших книгу
+        self.reserved_at: Dict[str, datetime] = {}  # user_name -> дата бронирования
+        for _ in range(copies):
+            self.add_copy()
+    
+    @property
+    def available_count(self) -> int:
+        """Количество экземпляров в библиотеке."""
+        return len(self.free_barcodes)
+    
+    @property
+    def total_count(self) -> int:
+        """Общее количество экземпляров."""
+        return len(self.copies)
+    
+    @property
+    def is_available(self) -> bool:
+        """Есть ли свободный экземпляр."""
+        return bool(self.free_barcodes)
+    
+    def add_copy(self, barcode: Optional[str] = None) -> Optional[BookCopy]:
+        """
+        Добавление экземпляра книги.
+        
+        Args:
+            barcode: Штрихкод экземпляра (генерируется автоматически, если не указан)
+            
+        Returns:
+            Созданный экземпляр или None, если экземпляр с таким штрихкодом уже есть
+        """
+        if barcode is None:
+            number = len(self.copies) + 1
+            barcode = f"{self.book_id}-{number}"
+            while barcode in self.copies:
+                number += 1
+                barcode = f"{self.book_id}-{number}"
+        elif barcode in self.copies:
+            return None
+        
+        copy = BookCopy(barcode, self.book_id)
+        self.copies[barcode] = copy
+        self.free_barcodes.append(barcode)
+        return copy
+    
+    def remove_copies(self, barcodes: List[str]) -> List[str]:
+        """
+        Удаление экземпляров книги за один проход по свободным экземплярам.
+        
+        Используется через Library.remove_copies, чтобы изменение попало в снимки и ленту.
+        
+        Args:
+            barcodes: Штрихкоды экземпляров для удаления
+            
+        Returns:
+            Штрихкоды удалённых экземпляров (выданные и ненайденные пропускаются)
+        """
+        removed = [barcode for barcode in dict.fromkeys(barcodes)
+                   if barcode in self.copies and self.copies[barcode].is_available]
+        if not removed:
+            return []
+        removed_set = set(removed)
+        self.free_barcodes = [barcode for barcode in self.free_barcodes if barcode not in removed_set]
+        for barcode in removed:
+            del self.copies[barcode]
+        return removed
+    
+    def take_copy(self) -> Optional[BookCopy]:
+        """Взятие свободного экземпляра за O(1) (None, если свободных нет)."""
+        if not self.free_barcodes:
+            return None
+        copy = self.copies[self.free_barcodes.pop()]
+        copy.is_available = False
+        return copy
+    
+    def release_copy(self, barcode: str) -> bool:
+        """
+        Возврат экземпляра в библиотеку.
+        
+        Returns:
+            True, если экземпляр возвращён, False если он не найден или не был выдан
+        """
+        copy = self.copies.get(barcode)
+        if copy is None or copy.is_available:
+            return False
+        copy.is_available = True
+        self.free_barcodes.append(barcode)
+        return True
     
     def __repr__(self) -> str:
         """Строковое представление книги."""
         status = "доступна" if self.is_available else "занята"
-        return f"Book(id={self.book_id}, title='{self.title}', author='{self.author}', status={status})"
+        return (f"Book(id={self.book_id}, title='{self.title}', author='{self.author}', "
+                f"status={status}, copies={self.available_count}/{self.total_count})")
     
     def __eq__(self, other) -> bool:
         """Проверка равенства книг по ID."""
@@ -38,14 +136,29 @@ class Book:
             "title": self.title,
             "author": self.author,
             "is_available": self.is_available,
-            "reservations": self.reservations
+            "copies": [copy.to_dict() for copy in self.copies.values()],
+            "reservations": list(self.reservations),
+            "reserved_at": {name: date.isoformat() for name, date in self.reserved_at.items()}
         }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Book':
         """Создание объекта Book из словаря (для загрузки из JSON)."""
-        book = cls(data["title"], data["author"], data["book_id"])
-        book.is_available = data["is_available"]
+        book = cls(data["title"], data["author"], data["book_id"], copies=0)
+        copies = data.get("copies")
+        if copies is None:
+            # Старый формат: одна книга - один экземпляр
+            copies = [{"barcode": f"{book.book_id}-1", "is_available": data["is_available"]}]
+        for copy_data in copies:
+            copy = BookCopy.from_dict(copy_data, book.book_id)
+            book.copies[copy.barcode] = copy
+            if copy.is_available:
+                book.free_barcodes.append(copy.barcode)
         book.reservations = data.get("reservations", [])
+        reserved_at = data.get("reserved_at", {})
+        for name in book.reservations:
+            # Для броней без даты срок отсчитывается с момента загрузки
+            date = reserved_at.get(name)
+            book.reserved_at[name] = datetime.fromisoformat(date) if date else datetime.now()
         return book
 
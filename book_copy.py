@@ -0,0 +1,41 @@
+from typing import Optional
+
+
+class BookCopy:
+    """Класс для представления физического экземпляра книги."""
+
+    def __init__(self, barcode: str, book_id: str, is_available: bool = True):
+        """
+        Инициализация экземпляра книги.
+
+        Args:
+            barcode: Штрихкод (инвентарный номер) экземпляра
+            book_id: ID книги (записи каталога), к которой относится экземпляр
+            is_available: Находится ли экземпляр в библиотеке
+        """
+        self.barcode = barcode
+        self.book_id = book_id
+        self.is_available = is_available
+
+    def __repr__(self) -> str:
+        """Строковое представление экземпляра."""
+        status = "доступен" if self.is_available else "выдан"
+        return f"BookCopy(barcode={self.barcode}, book_id={self.book_id}, status={status})"
+
+    def __eq__(self, other) -> bool:
+        """Проверка равенства экземпляров по штрихкоду."""
+        if isinstance(other, BookCopy):
+            return self.barcode == other.barcode
+        return False
+
+    def to_dict(self) -> dict:
+        """Преобразование экземпляра в словарь для сохранения в JSON."""
+        return {
+            "barcode": self.barcode,
+            "is_available": self.is_available
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, book_id: Optional[str] = None) -> 'BookCopy':
+        """Создание объекта BookCopy из словаря (для загрузки из JSON)."""
+        return cls(data["barcode"], book_id or data.get("book_id", ""), data.get("is_available", True))
@@ -0,0 +1,218 @@
+"""
+Лента изменений (change feed) библиотеки.
+
+Каждое изменение получает возрастающий порядковый номер (seq). События хранятся
+в кольцевом буфере фиксированного размера, поэтому публикация никогда не ждёт
+подписчиков: медленный подписчик просто отстаёт и, если буфер успел
+перезаписаться, узнаёт количество пропущенных событий.
+
+Номера событий начинаются с 1 заново в каждом процессе, поэтому у каждой ленты
+есть свой идентификатор (feed_id). Подписчик сохраняет пару (feed_id, offset);
+при возобновлении с чужим feed_id подписка отклоняется, и подписчик должен
+заново синхронизироваться по сохранённому файлу.
+"""
+
+import threading
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+# Виды событий
+BOOK_ADDED = "book_added"
+BOOK_REMOVED = "book_removed"
+COPIES_ADDED = "copies_added"
+COPIES_REMOVED = "copies_removed"
+LOAN_CREATED = "loan_created"
+LOAN_CLOSED = "loan_closed"
+RESERVATION_ADDED = "reservation_added"
+RESERVATION_EXPIRED = "reservation_expired"
+LOAN_OVERDUE = "loan_overdue"
+LIBRARY_LOADED = "library_loaded"
+
+
+class ChangeEvent:
+    """Класс для представления одного изменения библиотеки."""
+
+    def __init__(self, seq: int, kind: str, data: dict, timestamp: Optional[datetime] = None,
+                 feed_id: str = ""):
+        """
+        Инициализация события.
+
+        Args:
+            seq: Порядковый номер события (начиная с 1)
+            kind: Вид события (BOOK_ADDED, LOAN_CREATED, ...)
+            data: Данные события
+            timestamp: Время события (по умолчанию - текущее время)
+            feed_id: Идентификатор ленты, в которой опубликовано событие
+        """
+        self.feed_id = feed_id
+        self.seq = seq
+        self.kind = kind
+        self.data = data
+        self.timestamp = timestamp or datetime.now()
+
+    def __repr__(self) -> str:
+        """Строковое представление события."""
+        return f"ChangeEvent(seq={self.seq}, kind={self.kind})"
+
+    def to_dict(self) -> dict:
+        """Преобразование события в словарь для сохранения в JSON."""
+        return {
+            "feed_id": self.feed_id,
+            "seq": self.seq,
+            "kind": self.kind,
+            "data": self.data,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+
+class ChangeFeed:
+    """Упорядоченная лента изменений с ограниченным буфером."""
+
+    # Количество последних событий, доступных для чтения
+    BUFFER_SIZE = 10000
+
+    def __init__(self, buffer_size: Optional[int] = None):
+        """
+        Инициализация ленты.
+
+        Args:
+            buffer_size: Размер кольцевого буфера (по умолчанию BUFFER_SIZE)
+        """
+        self.buffer_size = buffer_size or self.BUFFER_SIZE
+        self.feed_id = uuid.uuid4().hex
+        self._buffer: List[Optional[ChangeEvent]] = [None] * self.buffer_size
+        self._next_seq = 1
+        self._condition = threading.Condition()
+
+    @property
+    def next_seq(self) -> int:
+        """Номер, который получит следующее событие."""
+        return self._next_seq
+
+    @property
+    def first_seq(self) -> int:
+        """Номер самого старого события, ещё доступного в буфере."""
+        return max(1, self._next_seq - self.buffer_size)
+
+    def publish(self, kind: str, data: dict) -> ChangeEvent:
+        """
+        Публикация события. Выполняется за O(1) и не ждёт подписчиков.
+
+        Args:
+            kind: Вид события
+            data: Данные события
+
+        Returns:
+            Опубликованное событие
+        """
+        with self._condition:
+            event = ChangeEvent(self._next_seq, kind, data, feed_id=self.feed_id)
+            self._buffer[event.seq % self.buffer_size] = event
+            self._next_seq += 1
+            self._condition.notify_all()
+        return event
+
+    def read(self, offset: int, limit: Optional[int] = None) -> Tuple[List[ChangeEvent], int]:
+        """
+        Чтение событий начиная с номера offset.
+
+        Args:
+            offset: Номер первого события для чтения
+            limit: Максимальное количество событий
+
+        Returns:
+            Кортеж (события, количество пропущенных событий, вытесненных из буфера)
+
+        Raises:
+            ValueError: offset меньше 1 или больше next_seq
+        """
+        with self._condition:
+            self._check_offset(offset)
+            first = self.first_seq
+            missed = max(0, first - offset)
+            start = max(offset, first)
+            end = self._next_seq
+            if limit is not None:
+                end = min(end, start + limit)
+            events = [self._buffer[seq % self.buffer_size] for seq in range(start, end)]
+        return events, missed
+
+    def _check_offset(self, offset: int) -> None:
+        """Проверка, что offset указывает на существующее или следующее событие."""
+        if offset < 1 or offset > self._next_seq:
+            raise ValueError(f"Недопустимый offset {offset}: допустимы значения от 1 до {self._next_seq}")
+
+    def wait(self, offset: int, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидание появления события с номером offset.
+
+        Returns:
+            True, если событие доступно, False если истёк таймаут
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._next_seq > offset, timeout)
+
+    def subscribe(self, offset: Optional[int] = None, feed_id: Optional[str] = None) -> 'Subscription':
+        """
+        Создание подписки.
+
+        Args:
+            offset: Номер события, с которого читать (по умолчанию - только новые события)
+            feed_id: Идентификатор ленты, к которому относится offset (при возобновлении)
+
+        Returns:
+            Объект Subscription
+
+        Raises:
+            ValueError: feed_id не совпадает с идентификатором ленты или offset недопустим
+        """
+        if feed_id is not None and feed_id != self.feed_id:
+            raise ValueError(f"Offset относится к другой ленте ({feed_id}), нужна повторная синхронизация")
+        with self._condition:
+            if offset is None:
+                offset = self._next_seq
+            self._check_offset(offset)
+            return Subscription(self, offset)
+
+
+class Subscription:
+    """Класс для последовательного чтения ленты изменений одним подписчиком."""
+
+    def __init__(self, feed: ChangeFeed, offset: int):
+        """
+        Инициализация подписки.
+
+        Args:
+            feed: Лента изменений
+            offset: Номер следующего события для чтения
+        """
+        self.feed = feed
+        self.offset = offset
+        self.missed = 0  # Всего событий, пропущенных из-за отставания
+
+    def __repr__(self) -> str:
+        """Строковое представление подписки."""
+        return f"Subscription(offset={self.offset}, missed={self.missed})"
+
+    def poll(self, max_events: int = 100, timeout: Optional[float] = None) -> List[ChangeEvent]:
+        """
+        Получение следующих событий.
+
+        Args:
+            max_events: Максимальное количество событий
+            timeout: Сколько ждать новых событий (None - не ждать)
+
+        Returns:
+            Список событий (пустой, если новых событий нет)
+        """
+        if timeout is not None:
+            self.feed.wait(self.offset, timeout)
+        events, missed = self.feed.read(self.offset, max_events)
+        self.missed += missed
+        if events:
+            self.offset = events[-1].seq + 1
+        elif missed:
+            self.offset += missed
+        return events
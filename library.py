@@ -1,10 +1,24 @@
-import json
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+import functools
+import threading
+from typing import List, Dict, Optional, Set, Tuple
+from datetime import datetime, timedelta
 
 from book import Book
 from user import User
 from loan import Loan
+from events import ChangeFeed
+from snapshot import CowMap, LibrarySnapshot
+import events
+import storage
+
+
+def _synchronized(method):
+    """Выполнение метода Library под блокировкой библиотеки."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class Library:
@@ -13,10 +27,62 @@ class Library:
     def __init__(self):
         """Инициализация библиотеки."""
         self.books: Dict[str, Book] = {}  # book_id -> Book
+        self.books_by_title: Dict[str, Book] = {}  # title -> Book (для быстрого поиска)
         self.users: Dict[str, User] = {}  # user_id -> User
         self.users_by_name: Dict[str, User] = {}  # user_name -> User (для быстрого поиска)
         self.loans: List[Loan] = []  # Список активных выдач
+        self.feed = ChangeFeed()  # Лента изменений для внешних подписчиков
+        self.lock = threading.RLock()  # Блокировка для фоновых задач (см. scheduler.py)
+        self.overdue_notified: Set[Tuple[str, str]] = set()  # (user_name, book_id) уже просроченных выдач
+        
+        # Снимки состояния: записи изменившихся объектов замораживаются при следующем snapshot()
+        self.version = 0
+        self._frozen_books = CowMap()  # book_id -> (Book.to_dict(), доступно, всего)
+        self._frozen_users = CowMap()  # user_id -> User.to_dict()
+        self._frozen_loans = CowMap()  # id(loan) -> Loan (выдачи не изменяются после создания)
+        self._dirty_books: Dict[str, None] = {}  # Изменившиеся книги (упорядоченное множество)
+        self._dirty_users: Dict[str, None] = {}  # Изменившиеся пользователи
+        self._snapshot: Optional[LibrarySnapshot] = None
+    
+    def _touch(self, book_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Отметка изменения состояния (вызывается под блокировкой)."""
+        self.version += 1
+        self._snapshot = None
+        if book_id is not None:
+            self._dirty_books[book_id] = None
+        if user_id is not None:
+            self._dirty_users[user_id] = None
+    
+    @_synchronized
+    def snapshot(self) -> LibrarySnapshot:
+        """
+        Получение снимка текущего состояния библиотеки.
+        
+        Под блокировкой замораживаются только изменившиеся с прошлого снимка
+        записи, остальные переиспользуются: стоимость снимка - O(изменённых
+        объектов + N / CowMap.CHUNK_SIZE). Снимок не меняется при дальнейших
+        изменениях библиотеки, поэтому его можно читать без блокировки.
+        Изменения должны выполняться через методы Library.
+        
+        Returns:
+            Объект LibrarySnapshot
+        """
+        if self._snapshot is None:
+            for book_id in self._dirty_books:
+                book = self.books.get(book_id)
+                if book is not None:
+                    self._frozen_books.set(book_id, (book.to_dict(), book.available_count, book.total_count))
+            for user_id in self._dirty_users:
+                user = self.users.get(user_id)
+                if user is not None:
+                    self._frozen_users.set(user_id, user.to_dict())
+            self._dirty_books.clear()
+            self._dirty_users.clear()
+            self._snapshot = LibrarySnapshot(self.version, self._frozen_books.freeze(),
+                                             self._frozen_users.freeze(), self._frozen_loans.freeze())
+        return self._snapshot
     
+    @_synchronized
     def add_book(self, book: Book) -> bool:
         """
         Добавление книги в библиотеку.
@@ -30,8 +96,53 @@ class Library:
         if book.book_id in self.books:
             return False
         self.books[book.book_id] = book
+        self.books_by_title.setdefault(book.title, book)
+        self._touch(book_id=book.book_id)
+        self.feed.publish(events.BOOK_ADDED, book.to_dict())
         return True
     
+    @_synchronized
+    def add_copies(self, book_id: str, count: int = 1) -> bool:
+        """
+        Добавление экземпляров существующей книги.
+        
+        Args:
+            book_id: ID книги
+            count: Количество новых экземпляров
+            
+        Returns:
+            True, если экземпляры добавлены, False если книга не найдена
+        """
+        book = self.books.get(book_id)
+        if book is None or count <= 0:
+            return False
+        barcodes = [book.add_copy().barcode for _ in range(count)]
+        self._touch(book_id=book_id)
+        self.feed.publish(events.COPIES_ADDED, {"book_id": book_id, "barcodes": barcodes})
+        return True
+    
+    @_synchronized
+    def remove_copies(self, book_id: str, barcodes: List[str]) -> List[str]:
+        """
+        Удаление экземпляров книги (только находящихся в библиотеке).
+        
+        Args:
+            book_id: ID книги
+            barcodes: Штрихкоды экземпляров для удаления
+            
+        Returns:
+            Штрихкоды удалённых экземпляров (пустой список, если книга не найдена)
+        """
+        book = self.books.get(book_id)
+        if book is None:
+            return []
+        removed = book.remove_copies(barcodes)
+        if removed:
+            self._touch(book_id=book_id)
+            self.feed.publish(events.COPIES_REMOVED, {"book_id": book_id, "barcodes": removed})
+        return removed
+    
+    @_synchronized
     def remove_book(self, book_id: str) -> bool:
         """
         Удаление книги из библиотеки.
@@ -46,14 +157,25 @@ class Library:
             return False
         
         book = self.books[book_id]
-        # Проверяем, не выдана ли книга
-        if not book.is_available:
+        # Проверяем, не выдан ли какой-нибудь экземпляр книги
+        if book.available_count < book.total_count:
             return False
         
         # Удаляем книгу
         del self.books[book_id]
+        self._frozen_books.pop(book_id)
+        self._touch()
+        if self.books_by_title.get(book.title) is book:
+            del self.books_by_title[book.title]
+            # Если есть другая книга с таким же названием, индексируем её
+            for other in self.books.values():
+                if other.title == book.title:
+                    self.books_by_title[book.title] = other
+                    break
+        self.feed.publish(events.BOOK_REMOVED, {"book_id": book_id, "title": book.title})
         return True
     
+    @_synchronized
     def add_user(self, user: User) -> bool:
         """
         Добавление пользователя в библиотеку.
@@ -68,8 +190,10 @@ class Library:
             return False
         self.users[user.user_id] = user
         self.users_by_name[user.name] = user
+        self._touch(user_id=user.user_id)
         return True
     
+    @_synchronized
     def remove_user(self, user_id: str) -> bool:
         """
         Удаление пользователя из библиотеки.
@@ -90,6 +214,8 @@ class Library:
         
         # Удаляем пользователя
         del self.users[user_id]
+        self._frozen_users.pop(user_id)
+        self._touch()
         if user.name in self.users_by_name:
             del self.users_by_name[user.name]
         return True
@@ -100,11 +226,9 @@ class Library:
     
     def find_book_by_title(self, book_title: str) -> Optional[Book]:
         """Поиск книги по названию."""
-        for book in self.books.values():
-            if book.title == book_title:
-                return book
-        return None
+        return self.books_by_title.get(book_title)
     
+    @_synchronized
     def borrow_book(self, user_name: str, book_title: str) -> Tuple[bool, str]:
         """
         Выдача книги пользователю.
@@ -124,21 +248,31 @@ class Library:
         if not book:
             return False, f"Книга '{book_title}' не найдена"
         
-        if not book.is_available:
-            return False, f"Книга '{book_title}' уже выдана"
+        if book.book_id in user.borrowed_books:
+            return False, f"Пользователь '{user_name}' уже взял книгу '{book_title}'"
+        
+        # Берём свободный экземпляр
+        copy = book.take_copy()
+        if copy is None:
+            return False, f"Все экземпляры книги '{book_title}' уже выданы"
         
         # Выдаём книгу
-        book.is_available = False
         user.borrowed_books.append(book.book_id)
-        loan = Loan(user_name, book.book_id)
+        loan = Loan(user_name, book.book_id, barcode=copy.barcode)
         self.loans.append(loan)
+        self._frozen_loans.set(id(loan), loan)
+        self._touch(book_id=book.book_id, user_id=user.user_id)
         
         # Если книга была зарезервирована этим пользователем, удаляем из резерваций
         if user_name in book.reservations:
             book.reservations.remove(user_name)
+            book.reserved_at.pop(user_name, None)
+        
+        self.feed.publish(events.LOAN_CREATED, loan.to_dict())
         
-        return True, f"Книга '{book_title}' успешно выдана пользователю '{user_name}'"
+        return True, f"Книга '{book_title}' (экземпляр {copy.barcode}) успешно выдана пользователю '{user_name}'"
     
+    @_synchronized
     def return_book(self, user_name: str, book_title: str) -> Tuple[bool, str]:
         """
         Возврат книги в библиотеку.
@@ -161,14 +295,25 @@ class Library:
         if book.book_id not in user.borrowed_books:
             return False, f"Пользователь '{user_name}' не брал книгу '{book_title}'"
         
-        # Возвращаем книгу
-        book.is_available = True
-        user.borrowed_books.remove(book.book_id)
-        
         # Удаляем выдачу
+        returned = [loan for loan in self.loans
+                    if loan.user_name == user_name and loan.book_id == book.book_id]
         self.loans = [loan for loan in self.loans 
                      if not (loan.user_name == user_name and loan.book_id == book.book_id)]
         
+        # Возвращаем экземпляр
+        user.borrowed_books.remove(book.book_id)
+        self._touch(book_id=book.book_id, user_id=user.user_id)
+        for loan in returned:
+            self._frozen_loans.pop(id(loan))
+            if loan.barcode is None or not book.release_copy(loan.barcode):
+                # Выдача без штрихкода: возвращаем любой выданный экземпляр
+                for copy in book.copies.values():
+                    if not copy.is_available:
+                        book.release_copy(copy.barcode)
+                        break
+            self.feed.publish(events.LOAN_CLOSED, loan.to_dict())
+        
         # Проверяем наличие резерваций
         message = f"Книга '{book_title}' успешно возвращена"
         if book.reservations:
@@ -176,6 +321,7 @@ class Library:
         
         return True, message
     
+    @_synchronized
     def reserve_book(self, user_name: str, book_title: str) -> Tuple[bool, str]:
         """
         Бронирование книги.
@@ -203,63 +349,79 @@ class Library:
         
         # Добавляем резервацию
         book.reservations.append(user_name)
+        book.reserved_at[user_name] = datetime.now()
+        self._touch(book_id=book.book_id)
+        self.feed.publish(events.RESERVATION_ADDED, {"book_id": book.book_id, "user_name": user_name})
         return True, f"Книга '{book_title}' зарезервирована для пользователя '{user_name}'"
     
+    @_synchronized
     def overdue_books(self) -> List[Loan]:
         """Получение списка просроченных книг."""
         return [loan for loan in self.loans if loan.is_overdue()]
     
+    @_synchronized
+    def sweep_overdue(self) -> List[Loan]:
+        """
+        Поиск выдач, ставших просроченными с прошлой проверки.
+        
+        Для каждой новой просроченной выдачи публикуется событие loan_overdue.
+        
+        Returns:
+            Список выдач, просроченных впервые
+        """
+        overdue = self.overdue_books()
+        current = {(loan.user_name, loan.book_id) for loan in overdue}
+        new_overdue = [loan for loan in overdue
+                       if (loan.user_name, loan.book_id) not in self.overdue_notified]
+        self.overdue_notified = current
+        for loan in new_overdue:
+            self.feed.publish(events.LOAN_OVERDUE, loan.to_dict())
+        return new_overdue
+    
+    @_synchronized
+    def expire_reservations(self, now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+        """
+        Снятие бронирований старше Book.RESERVATION_PERIOD_DAYS.
+        
+        Args:
+            now: Текущее время (по умолчанию - datetime.now())
+            
+        Returns:
+            Список пар (ID книги, имя пользователя) снятых бронирований
+        """
+        now = now or datetime.now()
+        expired = []
+        for book in self.books.values():
+            if not book.reservations:
+                continue
+            deadline = now - timedelta(days=book.RESERVATION_PERIOD_DAYS)
+            for user_name in list(book.reservations):
+                if book.reserved_at.get(user_name, now) <= deadline:
+                    book.reservations.remove(user_name)
+                    book.reserved_at.pop(user_name, None)
+                    expired.append((book.book_id, user_name))
+                    self._touch(book_id=book.book_id)
+                    self.feed.publish(events.RESERVATION_EXPIRED,
+                                      {"book_id": book.book_id, "user_name": user_name})
+        return expired
+    
     def get_all_books_status(self) -> List[Dict]:
         """
-        Получение статуса всех книг.
+        Получение статуса всех книг (по снимку состояния, без блокировки библиотеки).
         
         Returns:
             Список словарей с информацией о книгах
         """
-        result = []
-        for book in self.books.values():
-            status = "доступна" if book.is_available else "занята"
-            if book.reservations:
-                status += f" (зарезервирована: {', '.join(book.reservations)})"
-            
-            # Находим, кто взял книгу, если она занята
-            borrower = None
-            for loan in self.loans:
-                if loan.book_id == book.book_id:
-                    borrower = loan.user_name
-                    break
-            
-            result.append({
-                "id": book.book_id,
-                "title": book.title,
-                "author": book.author,
-                "status": status,
-                "borrower": borrower,
-                "reservations": book.reservations.copy()
-            })
-        return result
+        return self.snapshot().get_all_books_status()
     
     def get_users_and_books(self) -> List[Dict]:
         """
-        Получение списка пользователей и их взятых книг.
+        Получение списка пользователей и их взятых книг (по снимку состояния).
         
         Returns:
             Список словарей с информацией о пользователях
         """
-        result = []
-        for user in self.users.values():
-            borrowed_titles = []
-            for book_id in user.borrowed_books:
-                if book_id in self.books:
-                    borrowed_titles.append(self.books[book_id].title)
-            
-            result.append({
-                "user_id": user.user_id,
-                "name": user.name,
-                "borrowed_books": borrowed_titles,
-                "count": len(borrowed_titles)
-            })
-        return result
+        return self.snapshot().get_users_and_books()
     
     def get_top_users(self, limit: int = 5) -> List[Dict]:
         """
@@ -275,70 +437,91 @@ class Library:
         users_data.sort(key=lambda x: x["count"], reverse=True)
         return users_data[:limit]
     
-    def save_to_file(self, filename: str) -> bool:
+    def save_to_file(self, filename: str, mode: Optional[str] = None) -> bool:
         """
         Сохранение данных библиотеки в JSON файл.
         
+        Сохраняется снимок состояния, поэтому запись файла не блокирует
+        выдачу и возврат книг.
+        
         Args:
             filename: Имя файла для сохранения
+            mode: Режим записи (pretty, compact, gzip, lzma, jsonl);
+                  если не указан, определяется по расширению файла
             
         Returns:
             True, если сохранение успешно, False в случае ошибки
         """
         try:
-            data = {
-                "books": [book.to_dict() for book in self.books.values()],
-                "users": [user.to_dict() for user in self.users.values()],
-                "loans": [loan.to_dict() for loan in self.loans]
-            }
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            data = self.snapshot().to_dict()
             
+            storage.write_data(filename, data, mode)
             return True
         except Exception as e:
             print(f"Ошибка при сохранении: {e}")
             return False
     
-    def load_from_file(self, filename: str) -> bool:
+    @_synchronized
+    def load_from_file(self, filename: str, mode: Optional[str] = None) -> bool:
         """
         Загрузка данных библиотеки из JSON файла.
         
         Args:
             filename: Имя файла для загрузки
+            mode: Режим чтения (pretty, compact, gzip, lzma, jsonl);
+                  если не указан, определяется по расширению файла
             
         Returns:
             True, если загрузка успешна, False в случае ошибки
         """
+        # Разбираем файл в локальные структуры, чтобы ошибка не оставила
+        # библиотеку (и её снимки) в частично загруженном состоянии
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = storage.read_data(filename, mode)
             
             # Загружаем книги
-            self.books = {}
+            books: Dict[str, Book] = {}
+            books_by_title: Dict[str, Book] = {}
             for book_data in data.get("books", []):
                 book = Book.from_dict(book_data)
-                self.books[book.book_id] = book
+                books[book.book_id] = book
+                books_by_title.setdefault(book.title, book)
             
             # Загружаем пользователей
-            self.users = {}
-            self.users_by_name = {}
+            users: Dict[str, User] = {}
+            users_by_name: Dict[str, User] = {}
             for user_data in data.get("users", []):
                 user = User.from_dict(user_data)
-                self.users[user.user_id] = user
-                self.users_by_name[user.name] = user
+                users[user.user_id] = user
+                users_by_name[user.name] = user
             
             # Загружаем выдачи
-            self.loans = []
-            for loan_data in data.get("loans", []):
-                loan = Loan.from_dict(loan_data)
-                self.loans.append(loan)
-            
-            return True
+            loans = [Loan.from_dict(loan_data) for loan_data in data.get("loans", [])]
         except FileNotFoundError:
             print(f"Файл '{filename}' не найден")
             return False
         except Exception as e:
             print(f"Ошибка при загрузке: {e}")
             return False
-
+        
+        # Заменяем состояние целиком только после успешного разбора
+        self.books = books
+        self.books_by_title = books_by_title
+        self.users = users
+        self.users_by_name = users_by_name
+        self.loans = loans
+        self.overdue_notified = set()
+        
+        # Замораживаем загруженное состояние заново
+        self._frozen_books = CowMap()
+        self._frozen_users = CowMap()
+        self._frozen_loans = CowMap()
+        for loan in self.loans:
+            self._frozen_loans.set(id(loan), loan)
+        self._dirty_books = dict.fromkeys(self.books)
+        self._dirty_users = dict.fromkeys(self.users)
+        self._touch()
+        
+        # Подписчикам нужно заново синхронизировать своё состояние
+        self.feed.publish(events.LIBRARY_LOADED, {"filename": filename})
+        return True
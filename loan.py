@@ -9,7 +9,7 @@ class Loan:
     LOAN_PERIOD_DAYS = 30
     
     def __init__(self, user_name: str, book_id: str, loan_date: Optional[datetime] = None, 
-                 return_date: Optional[datetime] = None):
+                 return_date: Optional[datetime] = None, barcode: Optional[str] = None):
         """
         Инициализация выдачи книги.
         
@@ -18,9 +18,11 @@ class Loan:
             book_id: ID книги
             loan_date: Дата выдачи (по умолчанию - текущая дата)
             return_date: Дата возврата (вычисляется автоматически, если не указана)
+            barcode: Штрихкод выданного экземпляра
         """
         self.user_name = user_name
         self.book_id = book_id
+        self.barcode = barcode
         self.loan_date = loan_date or datetime.now()
         
         if return_date:
@@ -49,6 +51,7 @@ class Loan:
         return {
             "user_name": self.user_name,
             "book_id": self.book_id,
+            "barcode": self.barcode,
             "loan_date": self.loan_date.isoformat(),
             "return_date": self.return_date.isoformat()
         }
@@ -62,6 +65,7 @@ class Loan:
             data["user_name"],
             data["book_id"],
             loan_date,
-            return_date
+            return_date,
+            data.get("barcode")
         )
 
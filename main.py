@@ -2,9 +2,16 @@
 Главная программа для системы управления библиотекой.
 """
 
+import os
+
 from library import Library
 from book import Book
 from user import User
+from scheduler import Scheduler, create_library_scheduler
+
+
+# Файл автосохранения на случай аварийного завершения
+RECOVERY_FILENAME = "library_data.recovery.json"
 
 
 def print_menu():
@@ -39,9 +46,26 @@ def add_book_menu(library: Library):
         print("Ошибка: автор книги не может быть пустым")
         return
     
-    book = Book(title, author)
+    copies_input = input("Введите количество экземпляров (по умолчанию: 1): ").strip()
+    if not copies_input:
+        copies = 1
+    elif copies_input.isdigit() and int(copies_input) > 0:
+        copies = int(copies_input)
+    else:
+        print("Ошибка: количество экземпляров должно быть положительным числом")
+        return
+    
+    # Если такая книга уже есть в каталоге, добавляем к ней экземпляры
+    existing = library.find_book_by_title(title)
+    if existing and existing.author == author:
+        library.add_copies(existing.book_id, copies)
+        print(f"К книге '{title}' добавлено экземпляров: {copies} "
+              f"(всего: {existing.total_count}, ID: {existing.book_id})")
+        return
+    
+    book = Book(title, author, copies=copies)
     if library.add_book(book):
-        print(f"Книга '{title}' успешно добавлена (ID: {book.book_id})")
+        print(f"Книга '{title}' успешно добавлена (ID: {book.book_id}, экземпляров: {copies})")
     else:
         print("Ошибка: книга с таким ID уже существует")
 
@@ -140,7 +164,7 @@ def reserve_book_menu(library: Library):
     print(message)
 
 
-def show_reports_menu(library: Library):
+def show_reports_menu(library: Library, scheduler: Scheduler):
     """Меню отчётов."""
     print("\n--- ОТЧЁТЫ ПО БИБЛИОТЕКЕ ---")
     
@@ -149,6 +173,7 @@ def show_reports_menu(library: Library):
         print("2 - Пользователи и их книги")
         print("3 - Просроченные книги")
         print("4 - Пользователи с наибольшим количеством книг")
+        print("5 - Фоновые задачи")
         print("0 - Назад в главное меню")
         
         choice = input("\nВыберите отчёт: ").strip()
@@ -164,8 +189,8 @@ def show_reports_menu(library: Library):
                     print(f"  Название: {book_info['title']}")
                     print(f"  Автор: {book_info['author']}")
                     print(f"  Статус: {book_info['status']}")
-                    if book_info['borrower']:
-                        print(f"  Взята пользователем: {book_info['borrower']}")
+                    if book_info['borrowers']:
+                        print(f"  Взята пользователями: {', '.join(book_info['borrowers'])}")
         
         elif choice == "2":
             print("\n--- Пользователи и их книги ---")
@@ -209,6 +234,17 @@ def show_reports_menu(library: Library):
                         for book_title in user_info['borrowed_books']:
                             print(f"   - {book_title}")
         
+        elif choice == "5":
+            print("\n--- Фоновые задачи ---")
+            for job_info in scheduler.stats():
+                print(f"\n{job_info['name']} (каждые {job_info['interval']:.0f} с)")
+                print(f"  Запусков: {job_info['runs']}, ошибок: {job_info['errors']}")
+                if job_info['last_run']:
+                    print(f"  Последний запуск: {job_info['last_run']}")
+                    print(f"  Длительность: {job_info['last_duration'] * 1000:.1f} мс")
+                if job_info['last_error']:
+                    print(f"  Последняя ошибка: {job_info['last_error']}")
+        
         elif choice == "0":
             break
         else:
@@ -218,6 +254,7 @@ def show_reports_menu(library: Library):
 def save_data_menu(library: Library):
     """Меню сохранения данных."""
     print("\n--- Сохранение данных ---")
+    print("Формат выбирается по расширению: .json, .gz (gzip), .xz (lzma), .jsonl (JSON Lines)")
     filename = input("Введите имя файла (по умолчанию: library_data.json): ").strip()
     if not filename:
         filename = "library_data.json"
@@ -249,6 +286,14 @@ def main():
     print("Попытка загрузить данные из library_data.json...")
     library.load_from_file("library_data.json")
     
+    # Фоновые задачи: просрочки, истёкшие брони, автосохранение
+    # Автосохранение пишет в отдельный файл восстановления, а не в library_data.json
+    if os.path.exists(RECOVERY_FILENAME):
+        print(f"Найден файл восстановления '{RECOVERY_FILENAME}' после аварийного завершения. "
+              "Его можно загрузить через пункт 10.")
+    scheduler = create_library_scheduler(library, RECOVERY_FILENAME)
+    scheduler.start()
+    
     while True:
         print_menu()
         choice = input("\nВыберите действие: ").strip()
@@ -268,7 +313,7 @@ def main():
         elif choice == "7":
             reserve_book_menu(library)
         elif choice == "8":
-            show_reports_menu(library)
+            show_reports_menu(library, scheduler)
         elif choice == "9":
             save_data_menu(library)
         elif choice == "10":
@@ -276,8 +321,15 @@ def main():
         elif choice == "0":
             # Предложение сохранить данные перед выходом
             save_choice = input("\nСохранить данные перед выходом? (y/n): ").strip().lower()
+            saved = True
             if save_choice == 'y':
-                library.save_to_file("library_data.json")
+                saved = library.save_to_file("library_data.json")
+            scheduler.stop()
+            # Файл восстановления не нужен, если данные сохранены или от сохранения отказались
+            if not saved:
+                print(f"Данные не сохранены, файл восстановления '{RECOVERY_FILENAME}' оставлен")
+            elif os.path.exists(RECOVERY_FILENAME):
+                os.remove(RECOVERY_FILENAME)
             print("До свидания!")
             break
         else:
@@ -0,0 +1,219 @@
+"""
+Планировщик фоновых задач библиотеки.
+
+Задачи выполняются по очереди в отдельном потоке-демоне, поэтому не мешают
+работе меню. Каждая задача запускается не чаще, чем раз в min_gap секунд,
+даже если её запуск запрошен вручную через trigger().
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from library import Library
+import storage
+
+
+class Job:
+    """Класс для представления периодической задачи."""
+
+    # Минимальный интервал между запусками одной задачи (в секундах)
+    MIN_GAP = 1.0
+
+    def __init__(self, name: str, func: Callable[[], object], interval: float,
+                 min_gap: Optional[float] = None):
+        """
+        Инициализация задачи.
+
+        Args:
+            name: Имя задачи
+            func: Функция без аргументов, выполняющая задачу
+            interval: Период запуска (в секундах)
+            min_gap: Минимальный интервал между запусками (по умолчанию min(interval, MIN_GAP))
+        """
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.min_gap = min(interval, self.MIN_GAP) if min_gap is None else min_gap
+        self.next_run = time.monotonic() + interval
+        self.last_started: Optional[float] = None  # time.monotonic() последнего запуска
+        self.last_run: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_result = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.errors = 0
+
+    def __repr__(self) -> str:
+        """Строковое представление задачи."""
+        return f"Job(name='{self.name}', interval={self.interval}, runs={self.runs})"
+
+    def run(self) -> None:
+        """Выполнение задачи с записью статистики."""
+        self.last_started = time.monotonic()
+        self.last_run = datetime.now()
+        try:
+            self.last_result = self.func()
+            self.last_error = None
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+        self.last_duration = time.monotonic() - self.last_started
+        self.runs += 1
+        self.next_run = self.last_started + self.interval
+
+    def to_dict(self) -> dict:
+        """Статистика задачи в виде словаря."""
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error
+        }
+
+
+class Scheduler:
+    """Класс для выполнения периодических задач в фоновом потоке."""
+
+    def __init__(self):
+        """Инициализация планировщика."""
+        self.jobs: Dict[str, Job] = {}  # name -> Job
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def add_job(self, name: str, func: Callable[[], object], interval: float,
+                min_gap: Optional[float] = None) -> Optional[Job]:
+        """
+        Добавление задачи.
+
+        Returns:
+            Созданная задача или None, если задача с таким именем уже есть
+        """
+        with self._condition:
+            if name in self.jobs:
+                return None
+            job = Job(name, func, interval, min_gap)
+            self.jobs[name] = job
+            self._condition.notify()
+            return job
+
+    def trigger(self, name: str) -> bool:
+        """
+        Запрос внеочередного запуска задачи (с учётом min_gap).
+
+        Returns:
+            True, если запуск запланирован, False если задача не найдена
+        """
+        with self._condition:
+            job = self.jobs.get(name)
+            if job is None:
+                return False
+            earliest = time.monotonic()
+            if job.last_started is not None:
+                earliest = max(earliest, job.last_started + job.min_gap)
+            job.next_run = min(job.next_run, earliest)
+            self._condition.notify()
+            return True
+
+    def run_pending(self) -> int:
+        """
+        Выполнение всех задач, время которых наступило, в текущем потоке.
+
+        Returns:
+            Количество выполненных задач
+        """
+        now = time.monotonic()
+        with self._condition:
+            due = [job for job in self.jobs.values() if job.next_run <= now]
+        for job in due:
+            job.run()
+        return len(due)
+
+    def _loop(self) -> None:
+        """Основной цикл фонового потока."""
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                if self.jobs:
+                    delay = min(job.next_run for job in self.jobs.values()) - time.monotonic()
+                else:
+                    delay = None
+                if delay is None or delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            self.run_pending()
+
+    def start(self) -> None:
+        """Запуск фонового потока."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="library-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка фонового потока (текущая задача выполняется до конца)."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> List[dict]:
+        """Статистика по всем задачам."""
+        with self._condition:
+            return [job.to_dict() for job in self.jobs.values()]
+
+
+def autosave(library: Library, filename: str) -> None:
+    """
+    Сохранение снимка библиотеки в файл восстановления.
+
+    В отличие от Library.save_to_file ошибки не печатаются, а передаются
+    дальше, чтобы попасть в статистику задачи (errors, last_error).
+    Данные пишутся во временный файл рядом и заменяют прежний файл
+    восстановления только после успешной записи, поэтому сбой во время
+    автосохранения не портит предыдущую копию.
+    """
+    temp_filename = f"{filename}.tmp"
+    try:
+        storage.write_data(temp_filename, library.snapshot().to_dict(), storage.detect_mode(filename))
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def create_library_scheduler(library: Library, recovery_filename: Optional[str] = None,
+                             overdue_interval: float = 60, expiry_interval: float = 300,
+                             autosave_interval: float = 300) -> Scheduler:
+    """
+    Создание планировщика со стандартными задачами библиотеки.
+
+    Args:
+        library: Библиотека
+        recovery_filename: Файл восстановления для автосохранения (если не указан,
+                           автосохранение не выполняется). Должен отличаться от основного
+                           файла данных, чтобы отказ от сохранения при выходе работал
+        overdue_interval: Период поиска просроченных выдач (в секундах)
+        expiry_interval: Период снятия истёкших бронирований (в секундах)
+        autosave_interval: Период автосохранения (в секундах)
+
+    Returns:
+        Планировщик (ещё не запущенный)
+    """
+    scheduler = Scheduler()
+    scheduler.add_job("overdue_sweep", library.sweep_overdue, overdue_interval)
+    scheduler.add_job("reservation_expiry", library.expire_reservations, expiry_interval)
+    if recovery_filename:
+        scheduler.add_job("autosave", lambda: autosave(library, recovery_filename), autosave_interval)
+    return scheduler
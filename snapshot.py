@@ -0,0 +1,209 @@
+"""
+Снимки состояния библиотеки на момент времени.
+
+Снимок хранит «замороженные» записи книг и пользователей (словари to_dict),
+которые после создания не изменяются. Поэтому снимки разных версий делят
+записи неизменившихся объектов, а отчёты и сохранение читают снимок без
+блокировки библиотеки.
+
+Замороженные записи хранятся в CowMap: упорядоченном словаре, разбитом на блоки
+по CHUNK_SIZE ключей. Снимок копирует только список ссылок на блоки
+(O(N / CHUNK_SIZE)), а блок копируется (O(CHUNK_SIZE)) лишь при первой записи
+в него после снимка.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+class FrozenMap(Mapping):
+    """Неизменяемое упорядоченное отображение поверх блоков CowMap."""
+
+    def __init__(self, chunks: Tuple[dict, ...], size: int):
+        """
+        Инициализация отображения.
+
+        Args:
+            chunks: Блоки (не изменяются после заморозки)
+            size: Общее количество ключей
+        """
+        self._chunks = chunks
+        self._size = size
+        self._index: Optional[dict] = None  # Общий словарь для поиска по ключу (строится при первом обращении)
+
+    def __len__(self) -> int:
+        """Количество ключей."""
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        """Обход ключей в порядке добавления."""
+        for chunk in self._chunks:
+            yield from chunk
+
+    def __getitem__(self, key):
+        """Поиск по ключу (первое обращение строит индекс за O(N) без блокировки библиотеки)."""
+        if self._index is None:
+            index = {}
+            for chunk in self._chunks:
+                index.update(chunk)
+            self._index = index
+        return self._index[key]
+
+    def values(self):
+        """Обход значений в порядке добавления (без построения индекса)."""
+        for chunk in self._chunks:
+            yield from chunk.values()
+
+    def items(self):
+        """Обход пар (ключ, значение) в порядке добавления (без построения индекса)."""
+        for chunk in self._chunks:
+            yield from chunk.items()
+
+
+class CowMap:
+    """Упорядоченный словарь с копированием блоков при записи (copy-on-write)."""
+
+    # Количество ключей в одном блоке
+    CHUNK_SIZE = 256
+
+    def __init__(self):
+        """Инициализация пустого словаря."""
+        self._chunks: List[dict] = []
+        self._shared: List[bool] = []  # Блок используется замороженным снимком
+        self._chunk_of: Dict[Hashable, int] = {}  # ключ -> номер блока
+        self._last_fill = 0  # Сколько ключей добавлено в последний блок
+
+    def __len__(self) -> int:
+        """Количество ключей."""
+        return len(self._chunk_of)
+
+    def _writable(self, index: int) -> dict:
+        """Блок, доступный для записи (копируется, если используется снимком)."""
+        if self._shared[index]:
+            self._chunks[index] = dict(self._chunks[index])
+            self._shared[index] = False
+        return self._chunks[index]
+
+    def set(self, key: Hashable, value) -> None:
+        """Запись значения (новые ключи добавляются в конец)."""
+        index = self._chunk_of.get(key)
+        if index is None:
+            if not self._chunks or self._last_fill >= self.CHUNK_SIZE:
+                self._chunks.append({})
+                self._shared.append(False)
+                self._last_fill = 0
+            index = len(self._chunks) - 1
+            self._chunk_of[key] = index
+            self._last_fill += 1
+        self._writable(index)[key] = value
+
+    def pop(self, key: Hashable) -> None:
+        """Удаление ключа (если он есть)."""
+        index = self._chunk_of.pop(key, None)
+        if index is None:
+            return
+        del self._writable(index)[key]
+        # После множества удалений блоки пустеют - пересобираем их,
+        # чтобы заморозка оставалась O(N / CHUNK_SIZE)
+        if len(self._chunks) > 2 * (len(self._chunk_of) // self.CHUNK_SIZE) + 4:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Пересборка блоков с сохранением порядка ключей (амортизированно O(1) на удаление)."""
+        items = [item for chunk in self._chunks for item in chunk.items()]
+        self._chunks, self._shared, self._chunk_of = [], [], {}
+        self._last_fill = self.CHUNK_SIZE
+        for key, value in items:
+            self.set(key, value)
+
+    def freeze(self) -> FrozenMap:
+        """Заморозка текущего состояния за O(N / CHUNK_SIZE)."""
+        self._shared = [True] * len(self._chunks)
+        return FrozenMap(tuple(self._chunks), len(self._chunk_of))
+
+
+class LibrarySnapshot:
+    """Неизменяемый снимок состояния библиотеки."""
+
+    def __init__(self, version: int, books: Mapping, users: Mapping, loans: Mapping):
+        """
+        Инициализация снимка.
+
+        Args:
+            version: Версия состояния библиотеки
+            books: book_id -> (запись Book.to_dict, доступно экземпляров, всего экземпляров)
+            users: user_id -> замороженная запись пользователя (User.to_dict)
+            loans: Активные выдачи на момент снимка (ключ -> Loan)
+        """
+        self.version = version
+        self.books = books
+        self.users = users
+        self.loans = loans
+        self.created_at = datetime.now()
+
+    def __repr__(self) -> str:
+        """Строковое представление снимка."""
+        return (f"LibrarySnapshot(version={self.version}, books={len(self.books)}, "
+                f"users={len(self.users)}, loans={len(self.loans)})")
+
+    def get_all_books_status(self) -> List[Dict]:
+        """
+        Получение статуса всех книг.
+
+        Returns:
+            Список словарей с информацией о книгах
+        """
+        # Один проход по выдачам вместо поиска для каждой книги
+        borrowers: Dict[str, List[str]] = {}
+        for loan in self.loans.values():
+            borrowers.setdefault(loan.book_id, []).append(loan.user_name)
+
+        result = []
+        for book, available, total in self.books.values():
+            status = "доступна" if available else "занята"
+            status += f" ({available} из {total})"
+            if book["reservations"]:
+                status += f" (зарезервирована: {', '.join(book['reservations'])})"
+
+            result.append({
+                "id": book["book_id"],
+                "title": book["title"],
+                "author": book["author"],
+                "status": status,
+                "available": available,
+                "total": total,
+                "borrowers": borrowers.get(book["book_id"], []),
+                "reservations": list(book["reservations"])
+            })
+        return result
+
+    def get_users_and_books(self) -> List[Dict]:
+        """
+        Получение списка пользователей и их взятых книг.
+
+        Returns:
+            Список словарей с информацией о пользователях
+        """
+        result = []
+        for user in self.users.values():
+            borrowed_titles = []
+            for book_id in user["borrowed_books"]:
+                if book_id in self.books:
+                    borrowed_titles.append(self.books[book_id][0]["title"])
+
+            result.append({
+                "user_id": user["user_id"],
+                "name": user["name"],
+                "borrowed_books": borrowed_titles,
+                "count": len(borrowed_titles)
+            })
+        return result
+
+    def to_dict(self) -> dict:
+        """Преобразование снимка в словарь для сохранения в JSON."""
+        return {
+            "books": [book for book, _, _ in self.books.values()],
+            "users": list(self.users.values()),
+            "loans": [loan.to_dict() for loan in self.loans.values()]
+        }
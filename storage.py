@@ -0,0 +1,223 @@
+"""
+Форматы экспорта и импорта данных библиотеки.
+
+Поддерживаются режимы:
+    pretty  - JSON с отступами (формат по умолчанию, как раньше)
+    compact - JSON без лишних пробелов
+    gzip    - компактный JSON, сжатый gzip
+    lzma    - компактный JSON, сжатый lzma (xz)
+    jsonl   - JSON Lines: одна запись на строку, файл можно дописывать и делить на части
+
+Если установлен orjson, он используется для кодирования и разбора JSON,
+иначе используется стандартный модуль json.
+"""
+
+import gzip
+import json
+import lzma
+import os
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+
+MODES = ("pretty", "compact", "gzip", "lzma", "jsonl")
+
+# Разделы файла данных в порядке записи
+SECTIONS = ("books", "users", "loans")
+
+# Соответствие расширения файла режиму (для автоопределения)
+_EXTENSION_MODES = {
+    ".gz": "gzip",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+    ".jsonl": "jsonl",
+}
+
+
+def encoder_name() -> str:
+    """Имя используемого JSON-кодировщика."""
+    return "orjson" if orjson is not None else "json"
+
+
+def detect_mode(filename: str) -> str:
+    """Определение режима по расширению файла (по умолчанию - pretty)."""
+    extension = os.path.splitext(filename)[1].lower()
+    return _EXTENSION_MODES.get(extension, "pretty")
+
+
+def encode(data, compact: bool = True) -> bytes:
+    """
+    Кодирование данных в JSON (UTF-8).
+
+    Args:
+        data: Данные для кодирования
+        compact: True - без пробелов, False - с отступом в 2 пробела
+
+    Returns:
+        JSON в виде байтов
+    """
+    if orjson is not None:
+        if compact:
+            return orjson.dumps(data)
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+
+def decode(raw: bytes):
+    """Разбор JSON из байтов."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _iter_lines(data: Dict) -> Iterable[bytes]:
+    """Записи данных в формате JSON Lines."""
+    for section in SECTIONS:
+        for record in data.get(section, []):
+            yield encode({"section": section, "data": record}) + b"\n"
+
+
+def write_data(filename: str, data: Dict, mode: Optional[str] = None) -> None:
+    """
+    Запись данных библиотеки в файл.
+
+    Args:
+        filename: Имя файла
+        data: Словарь с разделами books, users, loans
+        mode: Режим записи (если не указан, определяется по расширению)
+    """
+    mode = mode or detect_mode(filename)
+    if mode == "pretty":
+        with open(filename, 'wb') as f:
+            f.write(encode(data, compact=False))
+    elif mode == "compact":
+        with open(filename, 'wb') as f:
+            f.write(encode(data))
+    elif mode == "gzip":
+        with gzip.open(filename, 'wb') as f:
+            f.write(encode(data))
+    elif mode == "lzma":
+        with lzma.open(filename, 'wb') as f:
+            f.write(encode(data))
+    elif mode == "jsonl":
+        with open(filename, 'wb') as f:
+            f.writelines(_iter_lines(data))
+    else:
+        raise ValueError(f"Неизвестный режим '{mode}', допустимые: {', '.join(MODES)}")
+
+
+def read_data(filename: str, mode: Optional[str] = None) -> Dict:
+    """
+    Чтение данных библиотеки из файла.
+
+    Args:
+        filename: Имя файла
+        mode: Режим чтения (если не указан, определяется по расширению)
+
+    Returns:
+        Словарь с разделами books, users, loans
+    """
+    mode = mode or detect_mode(filename)
+    if mode in ("pretty", "compact"):
+        with open(filename, 'rb') as f:
+            return decode(f.read())
+    if mode == "gzip":
+        with gzip.open(filename, 'rb') as f:
+            return decode(f.read())
+    if mode == "lzma":
+        with lzma.open(filename, 'rb') as f:
+            return decode(f.read())
+    if mode == "jsonl":
+        return read_jsonl([filename])
+    raise ValueError(f"Неизвестный режим '{mode}', допустимые: {', '.join(MODES)}")
+
+
+def read_jsonl(filenames: List[str]) -> Dict:
+    """
+    Чтение одного или нескольких файлов JSON Lines (например, частей после split_jsonl).
+
+    Args:
+        filenames: Список файлов в порядке чтения
+
+    Returns:
+        Словарь с разделами books, users, loans
+    """
+    data: Dict[str, List[dict]] = {section: [] for section in SECTIONS}
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = decode(line)
+                data.setdefault(record["section"], []).append(record["data"])
+    return data
+
+
+def append_jsonl(filename: str, section: str, records: Iterable[dict]) -> int:
+    """
+    Дописывание записей в конец файла JSON Lines.
+
+    Args:
+        filename: Имя файла
+        section: Раздел (books, users или loans)
+        records: Записи для добавления
+
+    Returns:
+        Количество дописанных записей
+    """
+    if section not in SECTIONS:
+        raise ValueError(f"Неизвестный раздел '{section}', допустимые: {', '.join(SECTIONS)}")
+    count = 0
+    with open(filename, 'ab') as f:
+        for record in records:
+            f.write(encode({"section": section, "data": record}) + b"\n")
+            count += 1
+    return count
+
+
+def split_jsonl(filename: str, lines_per_part: int) -> List[str]:
+    """
+    Деление файла JSON Lines на части по lines_per_part строк.
+
+    Части сохраняются рядом с исходным файлом: name.part1.jsonl, name.part2.jsonl, ...
+
+    Args:
+        filename: Исходный файл
+        lines_per_part: Максимальное количество строк в одной части
+
+    Returns:
+        Список имён созданных файлов
+    """
+    if lines_per_part <= 0:
+        raise ValueError("lines_per_part должно быть положительным")
+    base, extension = os.path.splitext(filename)
+    parts: List[str] = []
+    out = None
+    written = 0
+    try:
+        with open(filename, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if out is None or written >= lines_per_part:
+                    if out is not None:
+                        out.close()
+                    part_name = f"{base}.part{len(parts) + 1}{extension or '.jsonl'}"
+                    parts.append(part_name)
+                    out = open(part_name, 'wb')
+                    written = 0
+                out.write(line if line.endswith(b"\n") else line + b"\n")
+                written += 1
+    finally:
+        if out is not None:
+            out.close()
+    return parts
@@ -0,0 +1,60 @@
+import pytest
+
+from events import ChangeFeed
+from library import Library
+from book import Book
+from user import User
+
+
+def test_subscription_resumes_from_offset():
+    feed = ChangeFeed()
+    for i in range(5):
+        feed.publish("x", {"i": i})
+
+    subscription = feed.subscribe(offset=3, feed_id=feed.feed_id)
+    events = subscription.poll()
+
+    assert [event.seq for event in events] == [3, 4, 5]
+    assert subscription.offset == 6
+    assert subscription.missed == 0
+    assert all(event.feed_id == feed.feed_id for event in events)
+
+
+def test_slow_subscriber_counts_missed_events():
+    feed = ChangeFeed(buffer_size=4)
+    subscription = feed.subscribe()
+    for i in range(10):
+        feed.publish("x", {"i": i})
+
+    events = subscription.poll()
+
+    assert [event.seq for event in events] == [7, 8, 9, 10]
+    assert subscription.missed == 6
+    assert subscription.poll() == []
+
+
+def test_subscribe_rejects_offset_from_other_feed():
+    feed = ChangeFeed()
+    with pytest.raises(ValueError):
+        feed.subscribe(offset=1, feed_id="другая лента")
+
+
+def test_subscribe_rejects_offset_out_of_range():
+    feed = ChangeFeed()
+    with pytest.raises(ValueError):
+        feed.subscribe(offset=50)
+    with pytest.raises(ValueError):
+        feed.subscribe(offset=0)
+
+
+def test_published_book_event_does_not_change_with_book():
+    library = Library()
+    library.add_book(Book("A", "Автор", "b1", copies=1))
+    library.add_user(User("u"))
+    library.add_user(User("v"))
+    event = library.feed.read(1)[0][0]
+
+    library.borrow_book("u", "A")
+    library.reserve_book("v", "A")
+
+    assert event.data["reservations"] == []
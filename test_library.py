@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+
+from library import Library
+from book import Book
+from user import User
+import events
+
+
+def make_library() -> Library:
+    library = Library()
+    library.add_book(Book("A", "Автор", "b1", copies=1))
+    library.add_user(User("u", "u1"))
+    library.add_user(User("v", "v1"))
+    return library
+
+
+def test_expire_reservations_drops_old_holds():
+    library = make_library()
+    library.borrow_book("u", "A")
+    library.reserve_book("v", "A")
+    book = library.books["b1"]
+
+    assert library.expire_reservations() == []
+
+    later = datetime.now() + timedelta(days=Book.RESERVATION_PERIOD_DAYS, seconds=1)
+    assert library.expire_reservations(later) == [("b1", "v")]
+    assert book.reservations == []
+    assert book.reserved_at == {}
+    assert library.feed.read(library.feed.next_seq - 1)[0][0].kind == events.RESERVATION_EXPIRED
+
+
+def test_failed_load_keeps_previous_state(tmp_path):
+    library = make_library()
+    library.borrow_book("u", "A")
+    before = library.snapshot()
+    filename = str(tmp_path / "broken.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        # У пользователя нет user_id
+        f.write('{"books": [{"book_id": "n", "title": "N", "author": "a", "is_available": true}],'
+                ' "users": [{"name": "x"}], "loans": []}')
+
+    assert not library.load_from_file(filename)
+
+    assert list(library.books) == ["b1"]
+    assert list(library.users) == ["u1", "v1"]
+    snapshot = library.snapshot()
+    assert list(snapshot.books) == list(before.books) == ["b1"]
+    assert list(snapshot.users) == ["u1", "v1"]
+
+
+def test_successful_load_replaces_snapshot(tmp_path):
+    library = make_library()
+    library.snapshot()
+    filename = str(tmp_path / "data.json")
+    other = Library()
+    other.add_book(Book("N", "a", "n"))
+    assert other.save_to_file(filename)
+
+    assert library.load_from_file(filename)
+
+    assert list(library.snapshot().books) == ["n"]
+    assert list(library.snapshot().users) == []
+
+
+def test_snapshot_isolated_from_borrow_and_return():
+    library = make_library()
+    before = library.snapshot()
+
+    library.borrow_book("u", "A")
+    during = library.snapshot()
+    library.return_book("u", "A")
+    after = library.snapshot()
+
+    assert before.get_all_books_status()[0]["available"] == 1
+    assert before.get_users_and_books()[0]["borrowed_books"] == []
+    assert len(before.loans) == 0
+
+    status = during.get_all_books_status()[0]
+    assert (status["available"], status["total"], status["borrowers"]) == (0, 1, ["u"])
+    assert during.get_users_and_books()[0]["borrowed_books"] == ["A"]
+    assert [loan["user_name"] for loan in during.to_dict()["loans"]] == ["u"]
+
+    assert after.get_all_books_status()[0]["available"] == 1
+    assert len(after.loans) == 0
+    assert before.version < during.version < after.version
+
+
+def test_snapshot_is_cached_until_next_change():
+    library = make_library()
+    library.borrow_book("v", "A")
+    assert library.snapshot() is library.snapshot()
+    snapshot = library.snapshot()
+    library.reserve_book("u", "A")
+    assert library.snapshot() is not snapshot
+
+
+def test_snapshot_keeps_order_after_many_changes():
+    library = Library()
+    for i in range(1000):
+        library.add_book(Book(f"Книга {i}", "Автор", f"b{i}"))
+    library.snapshot()
+    for i in range(0, 1000, 2):
+        library.remove_book(f"b{i}")
+    library.add_book(Book("Новая", "Автор", "b0"))
+
+    assert list(library.snapshot().books) == list(library.books)
+    assert library.snapshot().get_all_books_status()[-1]["title"] == "Новая"
+
+
+def make_library_with_copies(copies: int = 3) -> Library:
+    library = Library()
+    library.add_book(Book("A", "Автор", "b1", copies=copies))
+    for name in ("u", "v", "w", "z"):
+        library.add_user(User(name, f"{name}1"))
+    return library
+
+
+def test_each_borrower_gets_own_copy():
+    library = make_library_with_copies(3)
+
+    for name in ("u", "v", "w"):
+        success, _ = library.borrow_book(name, "A")
+        assert success
+
+    barcodes = [loan.barcode for loan in library.loans]
+    assert len(set(barcodes)) == 3
+    assert set(barcodes) == set(library.books["b1"].copies)
+    book = library.books["b1"]
+    assert (book.available_count, book.total_count, book.is_available) == (0, 3, False)
+
+
+def test_borrow_fails_when_all_copies_are_out():
+    library = make_library_with_copies(2)
+    library.borrow_book("u", "A")
+    library.borrow_book("v", "A")
+
+    success, message = library.borrow_book("w", "A")
+
+    assert not success
+    assert "Все экземпляры" in message
+    assert len(library.loans) == 2
+
+
+def test_borrow_refuses_second_copy_of_same_title():
+    library = make_library_with_copies(3)
+    library.borrow_book("u", "A")
+
+    success, message = library.borrow_book("u", "A")
+
+    assert not success
+    assert "уже взял" in message
+    assert library.books["b1"].available_count == 2
+    assert library.users["u1"].borrowed_books == ["b1"]
+
+
+def test_return_releases_loan_barcode():
+    library = make_library_with_copies(3)
+    library.borrow_book("u", "A")
+    library.borrow_book("v", "A")
+    book = library.books["b1"]
+    u_barcode = next(loan.barcode for loan in library.loans if loan.user_name == "u")
+    v_barcode = next(loan.barcode for loan in library.loans if loan.user_name == "v")
+
+    success, _ = library.return_book("u", "A")
+
+    assert success
+    assert book.copies[u_barcode].is_available
+    assert not book.copies[v_barcode].is_available
+    assert book.available_count == 2
+    assert [loan.user_name for loan in library.loans] == ["v"]
+
+
+def test_load_old_one_copy_per_book_format(tmp_path):
+    filename = str(tmp_path / "old.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write('{"books": [{"book_id": "q", "title": "Q", "author": "a", "is_available": false,'
+                ' "reservations": []},'
+                ' {"book_id": "r", "title": "R", "author": "a", "is_available": true}],'
+                ' "users": [{"user_id": "1", "name": "n", "borrowed_books": ["q"]}],'
+                ' "loans": [{"user_name": "n", "book_id": "q", "loan_date": "2024-01-01T00:00:00",'
+                ' "return_date": "2024-02-01T00:00:00"}]}')
+    library = Library()
+
+    assert library.load_from_file(filename)
+
+    q, r = library.books["q"], library.books["r"]
+    assert list(q.copies) == ["q-1"] and not q.is_available
+    assert list(r.copies) == ["r-1"] and r.is_available
+    assert library.loans[0].barcode is None
+
+    # Выдача без штрихкода возвращается через поиск любого выданного экземпляра
+    success, _ = library.return_book("n", "Q")
+
+    assert success
+    assert q.copies["q-1"].is_available
+    assert q.available_count == 1
+    assert library.loans == []
+
+
+def test_add_copies():
+    library = make_library_with_copies(1)
+    library.borrow_book("u", "A")
+
+    assert library.add_copies("b1", 2)
+    assert not library.add_copies("нет такой", 1)
+    assert not library.add_copies("b1", 0)
+
+    book = library.books["b1"]
+    assert (book.available_count, book.total_count) == (2, 3)
+    assert len(set(book.copies)) == 3
+    assert library.snapshot().get_all_books_status()[0]["total"] == 3
+    assert library.borrow_book("v", "A")[0]
+
+
+def test_remove_copies_skips_borrowed_and_updates_snapshot():
+    library = make_library_with_copies(3)
+    library.borrow_book("u", "A")
+    book = library.books["b1"]
+    borrowed = library.loans[0].barcode
+    free = [barcode for barcode in book.copies if barcode != borrowed]
+    before = library.snapshot()
+    offset = library.feed.next_seq
+
+    removed = library.remove_copies("b1", [borrowed, free[0], "нет такого"])
+
+    assert removed == [free[0]]
+    assert (book.available_count, book.total_count) == (1, 2)
+    assert before.get_all_books_status()[0]["total"] == 3
+    assert library.snapshot().get_all_books_status()[0]["total"] == 2
+    event = library.feed.read(offset)[0][0]
+    assert (event.kind, event.data["barcodes"]) == (events.COPIES_REMOVED, [free[0]])
+    assert library.remove_copies("нет такой", [free[1]]) == []
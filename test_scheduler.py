@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from scheduler import Scheduler, autosave, create_library_scheduler
+from library import Library
+from user import User
+import storage
+
+
+def test_trigger_respects_min_gap():
+    scheduler = Scheduler()
+    runs = []
+    job = scheduler.add_job("job", lambda: runs.append(1), interval=60, min_gap=0.2)
+
+    scheduler.trigger("job")
+    assert scheduler.run_pending() == 1
+
+    # Повторный запрос сразу после запуска откладывается до конца min_gap
+    scheduler.trigger("job")
+    assert scheduler.run_pending() == 0
+    assert job.next_run >= job.last_started + 0.2
+
+    time.sleep(0.25)
+    assert scheduler.run_pending() == 1
+    assert len(runs) == 2
+
+
+def test_trigger_unknown_job():
+    assert not Scheduler().trigger("нет такой задачи")
+
+
+def test_autosave_failure_is_recorded(tmp_path):
+    filename = os.path.join(str(tmp_path), "нет такого каталога", "recovery.json")
+    scheduler = create_library_scheduler(Library(), filename)
+
+    scheduler.trigger("autosave")
+    scheduler.run_pending()
+
+    stats = {job["name"]: job for job in scheduler.stats()}["autosave"]
+    assert stats["runs"] == 1
+    assert stats["errors"] == 1
+    assert stats["last_error"]
+
+
+def test_autosave_writes_recovery_file(tmp_path):
+    filename = str(tmp_path / "recovery.json")
+    scheduler = create_library_scheduler(Library(), filename)
+
+    scheduler.trigger("autosave")
+    scheduler.run_pending()
+
+    assert os.path.exists(filename)
+
+
+def test_no_autosave_without_recovery_file():
+    scheduler = create_library_scheduler(Library())
+    assert "autosave" not in scheduler.jobs
+
+
+def test_failed_autosave_keeps_previous_recovery_file(tmp_path, monkeypatch):
+    filename = str(tmp_path / "recovery.json")
+    library = Library()
+    library.add_user(User("u", "u1"))
+    autosave(library, filename)
+    with open(filename, "rb") as f:
+        previous = f.read()
+
+    def broken_write(target, data, mode=None):
+        with open(target, "wb") as f:
+            f.write(b'{"books": [')
+        raise OSError("диск заполнен")
+
+    library.add_user(User("v", "v1"))
+    monkeypatch.setattr(storage, "write_data", broken_write)
+    with pytest.raises(OSError):
+        autosave(library, filename)
+
+    with open(filename, "rb") as f:
+        assert f.read() == previous
+    assert os.listdir(str(tmp_path)) == ["recovery.json"]
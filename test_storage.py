@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from library import Library
+from book import Book
+from user import User
+import storage
+
+
+_EXTENSIONS = {
+    "pretty": ".json",
+    "compact": ".json",
+    "gzip": ".json.gz",
+    "lzma": ".json.xz",
+    "jsonl": ".jsonl",
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        if storage.orjson is None:
+            pytest.skip("orjson не установлен")
+    else:
+        monkeypatch.setattr(storage, "orjson", None)
+    assert storage.encoder_name() == request.param
+    return request.param
+
+
+def make_library() -> Library:
+    library = Library()
+    library.add_book(Book("Война и мир", "Толстой", "b1", copies=2))
+    library.add_book(Book("Анна Каренина", "Толстой", "b2"))
+    library.add_user(User("Иван", "u1"))
+    library.add_user(User("Мария", "u2"))
+    library.borrow_book("Иван", "Война и мир")
+    library.borrow_book("Мария", "Анна Каренина")
+    library.reserve_book("Иван", "Анна Каренина")
+    return library
+
+
+@pytest.mark.parametrize("mode", storage.MODES)
+def test_round_trip(tmp_path, encoder, mode):
+    library = make_library()
+    filename = str(tmp_path / f"data{_EXTENSIONS[mode]}")
+
+    assert library.save_to_file(filename, mode)
+    loaded = Library()
+    assert loaded.load_from_file(filename, mode)
+
+    assert loaded.snapshot().to_dict() == library.snapshot().to_dict()
+    assert loaded.books["b1"].available_count == 1
+    assert loaded.books["b2"].reservations == ["Иван"]
+
+
+@pytest.mark.parametrize("filename, mode", [
+    ("data.json", "pretty"),
+    ("data.txt", "pretty"),
+    ("data.json.gz", "gzip"),
+    ("DATA.GZ", "gzip"),
+    ("data.xz", "lzma"),
+    ("data.lzma", "lzma"),
+    ("data.jsonl", "jsonl"),
+])
+def test_detect_mode(filename, mode):
+    assert storage.detect_mode(filename) == mode
+
+
+def test_save_with_extension_detects_mode(tmp_path):
+    filename = str(tmp_path / "data.json.gz")
+    assert make_library().save_to_file(filename)
+    with open(filename, "rb") as f:
+        assert f.read(2) == b"\x1f\x8b"
+
+
+def test_append_split_and_read_parts(tmp_path, encoder):
+    filename = str(tmp_path / "data.jsonl")
+    assert make_library().save_to_file(filename)
+    extra = [{"user_id": f"x{i}", "name": f"Читатель {i}", "borrowed_books": []} for i in range(5)]
+
+    assert storage.append_jsonl(filename, "users", extra) == 5
+    parts = storage.split_jsonl(filename, 3)
+
+    assert all(os.path.exists(part) for part in parts)
+    data = storage.read_jsonl(parts)
+    assert [book["book_id"] for book in data["books"]] == ["b1", "b2"]
+    assert [user["user_id"] for user in data["users"]] == ["u1", "u2"] + [f"x{i}" for i in range(5)]
+    assert len(data["loans"]) == 2
+
+
+def test_append_to_unknown_section(tmp_path):
+    with pytest.raises(ValueError):
+        storage.append_jsonl(str(tmp_path / "data.jsonl"), "authors", [])
+
+
+def test_unknown_mode_fails_save(tmp_path):
+    assert not make_library().save_to_file(str(tmp_path / "data.json"), "xml")
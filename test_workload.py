@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from workload import generate_trace, load_trace, replay, save_trace
+
+
+def test_trace_is_deterministic():
+    assert generate_trace(seed=5, ops=500) == generate_trace(seed=5, ops=500)
+    assert generate_trace(seed=5, ops=500) != generate_trace(seed=6, ops=500)
+
+
+def test_replay_counts_every_operation():
+    trace = generate_trace(seed=1, ops=300, titles=50, users=20)
+
+    result = replay(trace)
+
+    assert result["ops"] == 300
+    assert sum(stats["count"] for stats in result["by_op"].values()) == 300
+    assert "memory_growth_bytes" in result
+
+
+def test_rate_limited_latency_includes_schedule_lag():
+    trace = generate_trace(seed=1, ops=200, titles=50, users=20)
+
+    # При недостижимой скорости операции отстают от графика, и это видно в задержках
+    result = replay(trace, rate=1e9, measure_memory=False)
+
+    assert result["latency"]["max_ms"] >= result["duration_s"] * 1000 * 0.5
+
+
+def test_trace_round_trip(tmp_path):
+    trace = generate_trace(seed=2, ops=100, titles=20, users=10)
+    for name in ("trace.json", "trace.json.gz", "trace.xz"):
+        filename = str(tmp_path / name)
+        save_trace(filename, trace)
+        assert load_trace(filename) == trace
+
+
+def test_unsupported_trace_extension(tmp_path):
+    trace = generate_trace(seed=2, ops=10, titles=5, users=5)
+    for name in ("trace.jsonl", "trace.txt"):
+        with pytest.raises(ValueError):
+            save_trace(str(tmp_path / name), trace)
+    assert os.listdir(str(tmp_path)) == []
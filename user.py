@@ -31,7 +31,7 @@ class User:
         return {
             "user_id": self.user_id,
             "name": self.name,
-            "borrowed_books": self.borrowed_books
+            "borrowed_books": list(self.borrowed_books)
         }
     
     @classmethod
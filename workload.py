@@ -0,0 +1,329 @@
+"""
+Генератор синтетической нагрузки и воспроизведение трасс для планирования мощностей.
+
+Трасса содержит начальное состояние (книги и пользователи) и список операций.
+Популярность книг распределена по закону Ципфа, периодически возникают всплески
+возвратов и «штормы» бронирований одной популярной книги. Трасса полностью
+определяется параметрами и seed.
+
+Запуск:
+    python workload.py generate --seed 1 --ops 100000 -o trace.json
+    python workload.py replay trace.json --rate 5000
+"""
+
+import argparse
+import bisect
+import os
+from array import array
+import random
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from library import Library
+from book import Book
+from user import User
+import storage
+
+
+# Операции трассы: [вид, имя пользователя, название книги]
+BORROW = "borrow"
+RETURN = "return"
+RESERVE = "reserve"
+REPORT = "report"
+EXPIRE = "expire"
+
+# Расширения файлов трасс и режимы storage.py для них
+TRACE_MODES = {
+    ".json": "compact",
+    ".gz": "gzip",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+}
+
+
+def generate_trace(seed: int = 0, ops: int = 10000, titles: int = 1000, users: int = 500,
+                   zipf_s: float = 1.1, max_copies: int = 5, burst_every: int = 2000,
+                   burst_length: int = 200, report_rate: float = 0.001) -> Dict:
+    """
+    Генерация трассы операций.
+
+    Args:
+        seed: Начальное значение генератора случайных чисел
+        ops: Количество операций
+        titles: Количество книг (названий)
+        users: Количество пользователей
+        zipf_s: Показатель распределения Ципфа (больше - сильнее перекос к популярным книгам)
+        max_copies: Максимальное количество экземпляров одной книги
+        burst_every: Период (в операциях) между всплесками
+        burst_length: Длина всплеска (в операциях)
+        report_rate: Доля операций построения отчёта
+
+    Returns:
+        Словарь трассы: параметры, начальное состояние и список операций
+    """
+    rng = random.Random(seed)
+    book_titles = [f"Книга {i}" for i in range(titles)]
+    user_names = [f"Читатель {i}" for i in range(users)]
+    # Популярным книгам - больше экземпляров
+    copies = [max(1, round(max_copies / (rank + 1) ** 0.5)) for rank in range(titles)]
+
+    cum_weights = []
+    total = 0.0
+    for rank in range(titles):
+        total += 1 / (rank + 1) ** zipf_s
+        cum_weights.append(total)
+
+    def popular_title() -> int:
+        return min(bisect.bisect(cum_weights, rng.random() * total), titles - 1)
+
+    # Упрощённая модель состояния, чтобы операции были в основном выполнимыми
+    available = list(copies)
+    outstanding: List[tuple] = []  # (user, title) выданных книг
+    held = set()
+    trace_ops = []
+
+    for i in range(ops):
+        phase = i % burst_every if burst_every else burst_length
+        burst = (i // burst_every) % 2 if phase < burst_length else None
+        if burst == 0:
+            # Всплеск возвратов
+            weights = (0.1, 0.85, 0.05)
+        elif burst == 1:
+            # Шторм бронирований самой популярной книги
+            weights = (0.1, 0.1, 0.8)
+        else:
+            weights = (0.55, 0.35, 0.1)
+
+        if rng.random() < report_rate:
+            trace_ops.append([REPORT if rng.random() < 0.5 else EXPIRE, "", ""])
+            continue
+
+        kind = rng.choices((BORROW, RETURN, RESERVE), weights)[0]
+        if kind == RETURN and outstanding:
+            index = rng.randrange(len(outstanding))
+            outstanding[index], outstanding[-1] = outstanding[-1], outstanding[index]
+            user, title = outstanding.pop()
+            held.discard((user, title))
+            available[title] += 1
+        elif kind == RESERVE:
+            user = rng.randrange(users)
+            title = 0 if burst == 1 else popular_title()
+        else:
+            kind = BORROW
+            user = rng.randrange(users)
+            title = popular_title()
+            if available[title] > 0 and (user, title) not in held:
+                available[title] -= 1
+                outstanding.append((user, title))
+                held.add((user, title))
+        trace_ops.append([kind, user_names[user], book_titles[title]])
+
+    return {
+        "seed": seed,
+        "params": {
+            "ops": ops, "titles": titles, "users": users, "zipf_s": zipf_s,
+            "max_copies": max_copies, "burst_every": burst_every,
+            "burst_length": burst_length, "report_rate": report_rate
+        },
+        "books": [{"title": title, "author": f"Автор {i % 100}", "copies": copies[i]}
+                  for i, title in enumerate(book_titles)],
+        "users": user_names,
+        "ops": trace_ops
+    }
+
+
+def trace_mode(filename: str) -> str:
+    """
+    Режим storage.py для файла трассы по его расширению.
+
+    Raises:
+        ValueError: Расширение не поддерживается (например, .jsonl)
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in TRACE_MODES:
+        raise ValueError(f"Неподдерживаемое расширение файла трассы '{extension}', "
+                         f"допустимые: {', '.join(TRACE_MODES)}")
+    return TRACE_MODES[extension]
+
+
+def save_trace(filename: str, trace: Dict) -> None:
+    """Сохранение трассы в файл (формат определяется по расширению, см. TRACE_MODES)."""
+    storage.write_data(filename, trace, trace_mode(filename))
+
+
+def load_trace(filename: str) -> Dict:
+    """Загрузка трассы из файла."""
+    return storage.read_data(filename, trace_mode(filename))
+
+
+def build_library(trace: Dict) -> Library:
+    """Создание библиотеки с начальным состоянием трассы."""
+    library = Library()
+    for i, book_data in enumerate(trace["books"]):
+        library.add_book(Book(book_data["title"], book_data["author"], f"book_{i}",
+                              copies=book_data["copies"]))
+    for i, name in enumerate(trace["users"]):
+        library.add_user(User(name, f"user_{i}"))
+    return library
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Перцентиль по отсортированному списку (метод ближайшего ранга)."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _library_memory() -> int:
+    """Память, выделенная не в этом модуле (по данным tracemalloc)."""
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def replay(trace: Dict, rate: Optional[float] = None, library: Optional[Library] = None,
+           measure_memory: bool = True) -> Dict:
+    """
+    Воспроизведение трассы.
+
+    Args:
+        trace: Трасса (см. generate_trace)
+        rate: Целевая скорость (операций в секунду); None - максимально быстро
+        library: Библиотека (по умолчанию создаётся по начальному состоянию трассы)
+        measure_memory: Измерять ли рост памяти через tracemalloc (замедляет работу).
+                        В рост памяти не входят выделения самого workload.py
+
+    Returns:
+        Словарь с результатами: пропускная способность, перцентили задержек, память
+    """
+    library = library or build_library(trace)
+    handlers = {
+        BORROW: library.borrow_book,
+        RETURN: library.return_book,
+        RESERVE: library.reserve_book,
+        REPORT: lambda user, title: (bool(library.get_all_books_status()), ""),
+        EXPIRE: lambda user, title: (True, str(len(library.expire_reservations()))),
+    }
+    ops = trace["ops"]
+    # Массив задержек выделяется заранее, чтобы запись замеров не попадала в рост памяти
+    samples = array("d", bytes(8 * len(ops)))
+    failures: Dict[str, int] = {kind: 0 for kind in handlers}
+
+    if measure_memory:
+        tracemalloc.start()
+        memory_start = _library_memory()
+    start = time.perf_counter()
+    for i, (kind, user, title) in enumerate(ops):
+        if rate:
+            # Задержка отсчитывается от запланированного времени отправки, чтобы
+            # отставание от графика входило в перцентили (coordinated omission)
+            op_start = start + i / rate
+            delay = op_start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            op_start = time.perf_counter()
+        success, _ = handlers[kind](user, title)
+        samples[i] = time.perf_counter() - op_start
+        if not success:
+            failures[kind] += 1
+    duration = time.perf_counter() - start
+    if measure_memory:
+        memory_end = _library_memory()
+        memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies: Dict[str, List[float]] = {kind: [] for kind in handlers}
+    for (kind, _, _), value in zip(ops, samples):
+        latencies[kind].append(value)
+
+    def summary(values: List[float]) -> Dict:
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000
+        }
+
+    total_ops = len(ops)
+    result = {
+        "ops": total_ops,
+        "duration_s": duration,
+        "throughput_ops_s": total_ops / duration if duration else 0.0,
+        "target_rate": rate,
+        "latency": summary(list(samples)),
+        "by_op": {kind: dict(summary(values), failures=failures[kind])
+                  for kind, values in latencies.items() if values},
+    }
+    if measure_memory:
+        result["memory_growth_bytes"] = memory_end - memory_start
+        result["memory_peak_bytes"] = memory_peak
+    return result
+
+
+def print_report(result: Dict) -> None:
+    """Вывод результатов воспроизведения."""
+    print(f"Операций: {result['ops']}, время: {result['duration_s']:.2f} с, "
+          f"пропускная способность: {result['throughput_ops_s']:.0f} оп/с")
+    latency = result["latency"]
+    print(f"Задержка: p50={latency['p50_ms']:.3f} мс, p95={latency['p95_ms']:.3f} мс, "
+          f"p99={latency['p99_ms']:.3f} мс, max={latency['max_ms']:.3f} мс")
+    if "memory_growth_bytes" in result:
+        print(f"Рост памяти: {result['memory_growth_bytes'] / 1024:.1f} КБ, "
+              f"пик: {result['memory_peak_bytes'] / 1024:.1f} КБ")
+    print(f"\n{'операция':<8} {'кол-во':>8} {'ошибок':>8} {'p50, мс':>9} {'p99, мс':>9}")
+    for kind, stats in result["by_op"].items():
+        print(f"{kind:<8} {stats['count']:>8} {stats['failures']:>8} "
+              f"{stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+
+def main():
+    """Главная функция командной строки."""
+    parser = argparse.ArgumentParser(description="Генерация и воспроизведение нагрузки на библиотеку")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="сгенерировать трассу")
+    generate.add_argument("-o", "--output", required=True, help="файл трассы (.json, .gz, .xz)")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--ops", type=int, default=10000)
+    generate.add_argument("--titles", type=int, default=1000)
+    generate.add_argument("--users", type=int, default=500)
+    generate.add_argument("--zipf", type=float, default=1.1)
+    generate.add_argument("--max-copies", type=int, default=5, help="максимум экземпляров одной книги")
+    generate.add_argument("--burst-every", type=int, default=2000,
+                          help="период всплесков в операциях (0 - без всплесков)")
+    generate.add_argument("--burst-length", type=int, default=200, help="длина всплеска в операциях")
+    generate.add_argument("--report-rate", type=float, default=0.001, help="доля операций отчёта")
+
+    run = commands.add_parser("replay", help="воспроизвести трассу")
+    run.add_argument("trace", help="файл трассы")
+    run.add_argument("--rate", type=float, default=None, help="операций в секунду (по умолчанию - без ограничения)")
+    run.add_argument("--no-memory", action="store_true", help="не измерять память")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        if min(args.ops, args.burst_every, args.burst_length) < 0 or args.titles < 1 or args.users < 1:
+            parser.error("--titles и --users должны быть положительными, --ops и параметры всплесков - неотрицательными")
+        if args.max_copies < 1 or not 0 <= args.report_rate <= 1:
+            parser.error("--max-copies должно быть не меньше 1, --report-rate - от 0 до 1")
+        try:
+            trace_mode(args.output)
+        except ValueError as e:
+            parser.error(str(e))
+        trace = generate_trace(args.seed, args.ops, args.titles, args.users, args.zipf,
+                               args.max_copies, args.burst_every, args.burst_length, args.report_rate)
+        save_trace(args.output, trace)
+        print(f"Трасса из {len(trace['ops'])} операций сохранена в '{args.output}'")
+    else:
+        try:
+            trace_mode(args.trace)
+        except ValueError as e:
+            parser.error(str(e))
+        print_report(replay(load_trace(args.trace), args.rate, measure_memory=not args.no_memory))
+
+
+if __name__ == "__main__":
+    main()